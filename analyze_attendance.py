@@ -10,12 +10,24 @@ Usage:
 
 import os
 import sys
-import glob
+import io
 import argparse
+import numpy as np
 import pandas as pd
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from datetime import datetime
+from functools import lru_cache, partial
 from pathlib import Path
 
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
 # ─────────────────────────────────────────────
 # CONFIGURATION — edit these to match your class
 # ─────────────────────────────────────────────
@@ -26,12 +38,22 @@ CONFIG = {
     "late_threshold_min": 10,                # minutes after class start = "late"
     "early_leave_threshold_min": 10,         # minutes before class end = "left early"
     "ghost_join_max_min": 2,                 # sessions ≤ this are Zoom glitches
+    "time_format": "%m/%d/%Y %H:%M:%S",      # Join/Leave time format in the Zoom CSV
+    "numba_min_students": 20000,             # JIT-compile with numba (if installed) from this many students
     "raw_reports_dir": "raw_reports",        # folder with input CSVs
     "output_dir": "attendance_reports",      # folder for output Excel files
 }
 # ─────────────────────────────────────────────
 
 
+def prepare_config(config):
+    """Return a copy of config with the name filters lowercased once up front."""
+    config = dict(config)
+    config['professor_lc'] = config['professor'].lower()
+    config['exclude_lc'] = frozenset(e.lower() for e in config['exclude'])
+    return config
+
+
 def parse_args():
     parser = argparse.ArgumentParser(description="Analyze Zoom attendance CSV reports")
     parser.add_argument("file", nargs="?", help="Path to a specific CSV file")
@@ -39,18 +61,29 @@ def parse_args():
     return parser.parse_args()
 
 
+def list_csv_files(raw_dir):
+    """CSV files in raw_dir as os.DirEntry objects, sorted by name."""
+    if not os.path.isdir(raw_dir):
+        return []
+    with os.scandir(raw_dir) as it:
+        return sorted((e for e in it
+                       if e.name.endswith(".csv") and not e.name.startswith(".") and e.is_file()),
+                      key=lambda e: e.name)
+
+
 def pick_file_interactively(raw_dir):
-    files = sorted(glob.glob(os.path.join(raw_dir, "*.csv")))
+    entries = list_csv_files(raw_dir)
+    files = [e.path for e in entries]
     if not files:
         print(f"❌ No CSV files found in '{raw_dir}/'")
         print(f"   Put your Zoom attendance CSVs there and try again.")
         sys.exit(1)
 
     print("\n📂 Available attendance reports:")
-    for i, f in enumerate(files, 1):
-        size = os.path.getsize(f)
-        mtime = datetime.fromtimestamp(os.path.getmtime(f)).strftime("%Y-%m-%d")
-        print(f"  [{i}] {os.path.basename(f)}  ({size} bytes, modified {mtime})")
+    for i, e in enumerate(entries, 1):
+        st = e.stat()
+        mtime = datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d")
+        print(f"  [{i}] {e.name}  ({st.st_size} bytes, modified {mtime})")
 
     print(f"  [A] Process ALL files")
     print()
@@ -69,20 +102,107 @@ def pick_file_interactively(raw_dir):
     sys.exit(1)
 
 
+# Status codes returned by _compute_derived, in All Students sheet order
+STATUS_LABELS = ['Absent/Brief', 'Ghost Join', 'Present']
+# NaT as an int64 nanosecond value
+NAT_NS = np.iinfo(np.int64).min
+
+
+def _compute_derived(total_min, first_join_ns, last_leave_ns, class_start_ns, class_end_ns,
+                     class_duration, cfg_pct, cfg_late, cfg_early, cfg_ghost):
+    """Per-student attendance columns in one pass; plain NumPy, also valid numba code."""
+    pct = np.around(total_min / class_duration * 100, 1)
+    # 6e10 ns per minute; students with no join/leave time (NaT) stay NaN,
+    # so they are never flagged late or early
+    late_min = np.full(total_min.shape[0], np.nan)
+    joined = first_join_ns != NAT_NS
+    late_min[joined] = np.around(np.maximum(0.0, (first_join_ns[joined] - class_start_ns) / 6e10), 1)
+    early_min = np.full(total_min.shape[0], np.nan)
+    left = last_leave_ns != NAT_NS
+    early_min[left] = np.around(np.maximum(0.0, (class_end_ns - last_leave_ns[left]) / 6e10), 1)
+    is_late = late_min > cfg_late
+    left_early = early_min > cfg_early
+    ghost_only = total_min <= cfg_ghost
+    status_code = np.where(ghost_only, 1, np.where(pct >= cfg_pct, 2, 0))
+    return pct, late_min, early_min, is_late, left_early, ghost_only, status_code
+
+
+@lru_cache(maxsize=None)
+def _jit_compute_derived():
+    """numba-compiled _compute_derived, built on first use and reused by this process."""
+    try:
+        from numba import njit
+    except ImportError:
+        return _compute_derived
+    return njit(cache=True)(_compute_derived)
+
+
+def _aggregate_sessions(students, ghost_join_max_min):
+    """One summary row per student, reduced with NumPy over pd.factorize codes."""
+    codes, names = pd.factorize(students['User Name'], sort=False)
+    keep = codes >= 0                     # rows with no User Name are dropped, as groupby did
+    codes = codes[keep]
+    n = len(names)
+
+    duration = students['Duration(Minutes)'].to_numpy('float64')[keep]
+    total_min = np.bincount(codes, weights=np.nan_to_num(duration), minlength=n)
+    raw_sessions = np.bincount(codes, minlength=n)
+    # Exclude ghost sessions (≤ ghost_join_max_min) from "real" sessions count
+    real_sessions = np.bincount(codes[duration > ghost_join_max_min], minlength=n)
+
+    # First join / last leave on int64 nanoseconds; NaT is int64 min, so it is
+    # swapped for int64 max before the min and never wins the max
+    never = np.iinfo(np.int64).max
+    join_ns = students['Join time'].to_numpy('datetime64[ns]').view('i8')[keep]
+    leave_ns = students['Leave time'].to_numpy('datetime64[ns]').view('i8')[keep]
+    first_join = np.full(n, never)
+    np.minimum.at(first_join, codes, np.where(join_ns == NAT_NS, never, join_ns))
+    first_join[first_join == never] = NAT_NS
+    last_leave = np.full(n, NAT_NS)
+    np.maximum.at(last_leave, codes, leave_ns)
+
+    # Email is the first non-blank one
+    raw_email = students['User Email'].astype('string')[keep]
+    has_email = np.flatnonzero(raw_email.str.strip().ne('').fillna(False).to_numpy(bool))
+    email_codes, first = np.unique(codes[has_email], return_index=True)
+    emails = np.full(n, '', dtype=object)
+    emails[email_codes] = raw_email.to_numpy(object)[has_email[first]]
+
+    return pd.DataFrame({
+        'User Name': names,
+        'Email': emails,
+        'Total_Minutes': total_min.round(1),
+        'Raw_Sessions': raw_sessions,
+        'Real_Sessions': real_sessions,
+        'First_Join': first_join.view('datetime64[ns]'),
+        'Last_Leave': last_leave.view('datetime64[ns]'),
+    })
+
+
 def analyze_file(csv_path, config):
     print(f"\n{'='*60}")
     print(f"📋 Processing: {os.path.basename(csv_path)}")
     print(f"{'='*60}")
 
     # Load
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(csv_path, engine=CSV_ENGINE)
+    # Headers can be padded, so type the columns only after stripping them
     df.columns = df.columns.str.strip()
-    df['Join time'] = pd.to_datetime(df['Join time'])
-    df['Leave time'] = pd.to_datetime(df['Leave time'])
+    df = df.astype({'User Name': 'string', 'User Email': 'string'})
+    for col in ['Join time', 'Leave time']:
+        try:
+            df[col] = pd.to_datetime(df[col], format=config['time_format'], cache=True)
+        except ValueError as e:
+            raise ValueError(
+                f"{os.path.basename(csv_path)}: '{col}' values don't match "
+                f"CONFIG['time_format'] ({config['time_format']!r}). "
+                f"Update time_format to match your Zoom export."
+            ) from e
     df['Duration(Minutes)'] = pd.to_numeric(df['Duration(Minutes)'], errors='coerce')
+    name_lower = df['User Name'].str.lower()
 
     # Get class bounds from professor row
-    prof_rows = df[df['User Name'].str.lower() == config['professor'].lower()]
+    prof_rows = df[name_lower == config['professor_lc']]
     if prof_rows.empty:
         print(f"⚠️  Professor '{config['professor']}' not found. Using first/last timestamps.")
         class_start = df['Join time'].min()
@@ -99,66 +219,53 @@ def analyze_file(csv_path, config):
           f"Time: {time_str}  |  Duration: {class_duration:.0f} min")
 
     # Filter out professor/TAs
-    exclude_lower = [e.lower() for e in config['exclude']]
-    students = df[~df['User Name'].str.lower().isin(exclude_lower)].copy()
+    students = df[~name_lower.isin(config['exclude_lc'])]
 
     # Aggregate multiple sessions per student
-    def agg_student(grp):
-        email = next((v for v in grp['User Email'] if pd.notna(v) and str(v).strip()), '')
-        total_min = grp['Duration(Minutes)'].sum()
-        sessions = len(grp)
-        first_join = grp['Join time'].min()
-        last_leave = grp['Leave time'].max()
-        # Exclude ghost sessions (≤ ghost_join_max_min) from "real" sessions count
-        real_sessions = grp[grp['Duration(Minutes)'] > config['ghost_join_max_min']]
-        real_session_count = len(real_sessions)
-        return pd.Series({
-            'Email': email,
-            'Total_Minutes': round(total_min, 1),
-            'Raw_Sessions': sessions,
-            'Real_Sessions': real_session_count,
-            'First_Join': first_join,
-            'Last_Leave': last_leave,
-        })
-
-    summary = students.groupby('User Name', group_keys=False).apply(agg_student).reset_index()
-
-    # Derived columns
-    summary['Pct_Attended'] = (summary['Total_Minutes'] / class_duration * 100).round(1)
-    summary['Late_Join_Min'] = ((summary['First_Join'] - class_start)
-                                 .dt.total_seconds() / 60).round(1).clip(lower=0)
-    summary['Left_Early_Min'] = ((class_end - summary['Last_Leave'])
-                                  .dt.total_seconds() / 60).round(1).clip(lower=0)
-    summary['Is_Late'] = summary['Late_Join_Min'] > config['late_threshold_min']
-    summary['Left_Early'] = summary['Left_Early_Min'] > config['early_leave_threshold_min']
-    summary['Reconnected'] = summary['Real_Sessions'] > 1
-    summary['Ghost_Only'] = summary['Total_Minutes'] <= config['ghost_join_max_min']
-
-    summary['Status'] = summary.apply(lambda r:
-        'Ghost Join' if r['Ghost_Only'] else
-        ('Present' if r['Pct_Attended'] >= config['min_attendance_pct'] else 'Absent/Brief'),
-        axis=1
+    summary = _aggregate_sessions(students, config['ghost_join_max_min'])
+
+    # Derived columns; numba only pays for its import/compile on very large classes
+    compute_derived = (_jit_compute_derived() if len(summary) >= config['numba_min_students']
+                       else _compute_derived)
+    (summary['Pct_Attended'], summary['Late_Join_Min'], summary['Left_Early_Min'],
+     summary['Is_Late'], summary['Left_Early'], summary['Ghost_Only'], status_code) = compute_derived(
+        summary['Total_Minutes'].to_numpy('float64'),
+        summary['First_Join'].to_numpy('datetime64[ns]').view('i8'),
+        summary['Last_Leave'].to_numpy('datetime64[ns]').view('i8'),
+        class_start.as_unit('ns').value,
+        class_end.as_unit('ns').value,
+        class_duration,
+        config['min_attendance_pct'],
+        config['late_threshold_min'],
+        config['early_leave_threshold_min'],
+        config['ghost_join_max_min'],
     )
-
-    # Flags column (human-readable)
-    def build_flags(r):
-        flags = []
-        if r['Is_Late']:
-            flags.append(f"late +{r['Late_Join_Min']:.0f}min")
-        if r['Left_Early']:
-            flags.append(f"left early -{r['Left_Early_Min']:.0f}min")
-        if r['Reconnected']:
-            flags.append(f"reconnected {r['Real_Sessions']}x")
-        if r['Ghost_Only']:
-            flags.append("ghost join (≤2min)")
-        return ", ".join(flags)
-
-    summary['Flags'] = summary.apply(build_flags, axis=1)
+    summary['Reconnected'] = summary['Real_Sessions'] > 1
+    summary['Status'] = pd.Categorical.from_codes(status_code, categories=STATUS_LABELS, ordered=True)
+
+    # Flags column (human-readable), concatenated as pandas strings
+    # (Arrow-backed when pyarrow is installed)
+    late_min = summary['Late_Join_Min'].fillna(0).round().astype('int32').astype('string')
+    early_min = summary['Left_Early_Min'].fillna(0).round().astype('int32').astype('string')
+    sessions = summary['Real_Sessions'].astype('string')
+    ghost = pd.Series('ghost join (≤2min)', index=summary.index, dtype='string')
+    flag_parts = [
+        ('late +' + late_min + 'min').where(summary['Is_Late'], ''),
+        ('left early -' + early_min + 'min').where(summary['Left_Early'], ''),
+        ('reconnected ' + sessions + 'x').where(summary['Reconnected'], ''),
+        ghost.where(summary['Ghost_Only'], ''),
+    ]
+    flags = pd.Series('', index=summary.index, dtype='string')
+    for part in flag_parts:
+        flags = flags.where(part == '', flags.where(flags == '', flags + ', ') + part)
+    summary['Flags'] = flags
 
     # Print summary
-    present = summary[summary['Status'] == 'Present'].sort_values('First_Join')
-    absent = summary[summary['Status'] == 'Absent/Brief'].sort_values('Total_Minutes', ascending=False)
-    ghosts = summary[summary['Status'] == 'Ghost Join']
+    parts = dict(tuple(summary.groupby('Status', observed=True, sort=False)))
+    empty = summary.iloc[:0]
+    present = parts.get('Present', empty).sort_values('First_Join')
+    absent = parts.get('Absent/Brief', empty).sort_values('Total_Minutes', ascending=False)
+    ghosts = parts.get('Ghost Join', empty)
 
     print(f"\n✅ Present: {len(present)}  |  ❌ Absent/Brief: {len(absent)}  |  "
           f"👻 Ghost Joins: {len(ghosts)}  |  Total unique: {len(summary)}\n")
@@ -183,34 +290,56 @@ def analyze_file(csv_path, config):
                  'Real_Sessions', 'First_Join', 'Last_Leave', 'Is_Late',
                  'Left_Early', 'Reconnected', 'Flags']
 
-    with pd.ExcelWriter(out_path, engine='openpyxl') as writer:
-        from openpyxl.styles import PatternFill, Font, Alignment
-        from openpyxl.utils import get_column_letter
+    def column_widths(df_sheet):
+        # Longest header/value per column, capped at 40; empty sheets fall back to the header
+        cells = df_sheet.astype('string').fillna('')
+        lengths = cells.apply(lambda col: col.str.len()).max().fillna(0).astype(int)
+        return [min(max(len(str(c)), n) + 2, 40) for c, n in lengths.items()]
+
+    def sheet_rows(df_sheet):
+        # Plain Python values per row; NaN/NaT become blank cells
+        values = df_sheet.astype(object).where(df_sheet.notna(), None)
+        return values.itertuples(index=False, name=None)
+
+    # constant_memory flushes each row to disk as soon as the next one starts,
+    # so every sheet is written strictly top to bottom.
+    with xlsxwriter.Workbook(out_path, {'constant_memory': True,
+                                        'default_date_format': 'yyyy-mm-dd hh:mm:ss'}) as workbook:
+        header_fmt = workbook.add_format({'bold': True, 'bg_color': '#1F4E79', 'font_color': '#FFFFFF'})
+        raw_header_fmt = workbook.add_format({'bold': True})
+        status_colors = {
+            'Present': '#E2EFDA',
+            'Absent/Brief': '#FCE4D6',
+            'Ghost Join': '#F2F2F2',
+        }
+        # One format and conditional-format rule per status, shared by every sheet
+        status_letter = xl_col_to_name(col_order.index('Status'))
+        status_rules = [
+            {'type': 'formula',
+             'criteria': f'=${status_letter}2="{status}"',
+             'format': workbook.add_format({'bg_color': color})}
+            for status, color in status_colors.items()
+        ]
+
+        def write_rows(sheet_name, df_sheet, header):
+            ws = workbook.add_worksheet(sheet_name)
+            ws.write_row(0, 0, df_sheet.columns.tolist(), header)
+            for r, row in enumerate(sheet_rows(df_sheet), start=1):
+                ws.write_row(r, 0, row)
+            return ws
+
+        def set_widths(ws, df_sheet):
+            for i, width in enumerate(column_widths(df_sheet)):
+                ws.set_column(i, i, width)
 
         def write_sheet(df_sheet, sheet_name):
-            df_sheet[col_order].to_excel(writer, sheet_name=sheet_name, index=False)
-            ws = writer.sheets[sheet_name]
-            # Style header
-            for cell in ws[1]:
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill("solid", fgColor="1F4E79")
-                cell.font = Font(bold=True, color="FFFFFF")
+            df_sheet = df_sheet[col_order]
+            ws = write_rows(sheet_name, df_sheet, header_fmt)
+            set_widths(ws, df_sheet)
             # Color rows by status
-            status_colors = {
-                'Present': 'E2EFDA',
-                'Absent/Brief': 'FCE4D6',
-                'Ghost Join': 'F2F2F2',
-            }
-            status_col = col_order.index('Status') + 1
-            for row in ws.iter_rows(min_row=2):
-                status_val = row[status_col - 1].value
-                color = status_colors.get(status_val, 'FFFFFF')
-                for cell in row:
-                    cell.fill = PatternFill("solid", fgColor=color)
-            # Auto-width
-            for col_cells in ws.columns:
-                max_len = max((len(str(c.value or '')) for c in col_cells), default=10)
-                ws.column_dimensions[get_column_letter(col_cells[0].column)].width = min(max_len + 2, 40)
+            if len(df_sheet) > 0:
+                for rule in status_rules:
+                    ws.conditional_format(1, 0, len(df_sheet), len(col_order) - 1, rule)
 
         # All students
         all_sorted = summary.sort_values(['Status', 'Pct_Attended'], ascending=[True, False])
@@ -227,8 +356,10 @@ def analyze_file(csv_path, config):
         if len(ghosts) > 0:
             write_sheet(ghosts, 'Ghost Joins')
 
-        # Raw data
-        df.to_excel(writer, sheet_name='Raw Data', index=False)
+        # Raw data, with timestamps back in the CSV's own format
+        raw = df.assign(**{c: df[c].dt.strftime(config['time_format'])
+                           for c in ['Join time', 'Leave time']})
+        write_rows('Raw Data', raw, raw_header_fmt)
 
         # Stats sheet
         stats = pd.DataFrame([
@@ -242,29 +373,29 @@ def analyze_file(csv_path, config):
             ['Ghost Joins', len(ghosts)],
             ['Attendance Rate', f'{len(present)/max(len(summary)-len(ghosts),1)*100:.1f}%'],
         ], columns=['Metric', 'Value'])
-        stats.to_excel(writer, sheet_name='Class Stats', index=False)
-        ws = writer.sheets['Class Stats']
-        for cell in ws[1]:
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill("solid", fgColor="1F4E79")
-            cell.font = Font(bold=True, color="FFFFFF")
-        for col_cells in ws.columns:
-            max_len = max((len(str(c.value or '')) for c in col_cells), default=10)
-            ws.column_dimensions[get_column_letter(col_cells[0].column)].width = min(max_len + 2, 40)
+        set_widths(write_rows('Class Stats', stats, header_fmt), stats)
 
     print(f"\n💾 Report saved → {out_path}")
     return out_path
 
 
+def analyze_file_buffered(csv_path, config):
+    """Run analyze_file in a worker process, returning its console output."""
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        analyze_file(csv_path, config)
+    return buf.getvalue()
+
+
 def main():
     args = parse_args()
-    config = CONFIG
+    config = prepare_config(CONFIG)
 
     # Determine which files to process
     if args.file:
         files = [args.file]
     elif args.all:
-        files = sorted(glob.glob(os.path.join(config['raw_reports_dir'], "*.csv")))
+        files = [e.path for e in list_csv_files(config['raw_reports_dir'])]
         if not files:
             print(f"❌ No CSV files found in '{config['raw_reports_dir']}/'")
             sys.exit(1)
@@ -272,8 +403,15 @@ def main():
     else:
         files = pick_file_interactively(config['raw_reports_dir'])
 
-    for f in files:
-        analyze_file(f, config)
+    if len(files) > 1:
+        # Files are independent, so analyze them in parallel and print each
+        # file's output in order once it finishes.
+        workers = min(os.cpu_count() or 1, len(files))
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            for output in ex.map(partial(analyze_file_buffered, config=config), files):
+                print(output, end="")
+    else:
+        analyze_file(files[0], config)
 
     print(f"\n✅ Done! Check the '{config['output_dir']}/' folder for your reports.\n")
 
@@ -284,3 +422,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\n⚠️  Cancelled.")
         sys.exit(0)
+    except ValueError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)